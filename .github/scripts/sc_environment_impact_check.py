@@ -7,18 +7,51 @@ Configurable via sc-environment-impact-config.yml for reuse across repositories.
 """
 
 import argparse
+import hashlib
+import io
 import json
 import os
 import re
+import stat
 import subprocess
 import sys
-from dataclasses import dataclass, field, asdict
+import threading
+from bisect import bisect_right
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
+from fnmatch import translate
 from functools import total_ordering
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
 import yaml
 
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+try:
+    import orjson
+except ImportError:
+    # Optional faster JSON serializer; the json module is used without it
+    orjson = None
+
+try:
+    import pygit2
+except ImportError:
+    # Optional in-process git access; the git CLI is used without it
+    pygit2 = None
+
+try:
+    import hyperscan
+except ImportError:
+    # Optional accelerator for the line prefilter; the re module is used without it
+    hyperscan = None
+
 
 @total_ordering
 class ImpactLevel(Enum):
@@ -30,8 +63,9 @@ class ImpactLevel(Enum):
     CRITICAL = "critical"
 
     def __lt__(self, other):
-        order = [self.NONE, self.LOW, self.MEDIUM, self.HIGH, self.CRITICAL]
-        return order.index(self) < order.index(other)
+        if not isinstance(other, ImpactLevel):
+            return NotImplemented
+        return ImpactLevel._ORDER[self] < ImpactLevel._ORDER[other]
 
     def __eq__(self, other):
         if isinstance(other, ImpactLevel):
@@ -41,6 +75,42 @@ class ImpactLevel(Enum):
     __hash__ = Enum.__hash__
 
 
+# Severity rank of each level, built once rather than on every comparison
+ImpactLevel._ORDER = {
+    level: rank
+    for rank, level in enumerate([
+        ImpactLevel.NONE, ImpactLevel.LOW, ImpactLevel.MEDIUM, ImpactLevel.HIGH, ImpactLevel.CRITICAL
+    ])
+}
+
+
+_IMPACT_EMOJI: Mapping[ImpactLevel, str] = {
+    ImpactLevel.CRITICAL: "🔴",
+    ImpactLevel.HIGH: "🟠",
+    ImpactLevel.MEDIUM: "🟡",
+    ImpactLevel.LOW: "🟢",
+    ImpactLevel.NONE: "⚪"
+}
+
+# Report body when nothing was detected, listing what the scan covers
+_NO_IMPACT_LINES = (
+    "No SC Environment-specific impacts detected in this PR.",
+    "",
+    "<details>",
+    "<summary>What was checked</summary>",
+    "",
+    "This PR was automatically scanned for:",
+    "- Database migrations",
+    "- ClowdApp configuration changes",
+    "- Kessel integration changes",
+    "- AWS service integrations (S3, RDS, ElastiCache)",
+    "- Kafka topic changes",
+    "- Secrets management changes",
+    "- External dependencies",
+    "</details>",
+)
+
+
 @dataclass
 class ImpactItem:
     """Represents a single item that impacts SC Environment"""
@@ -51,6 +121,17 @@ class ImpactItem:
     details: List[str] = field(default_factory=list)
     recommendation: Optional[str] = None
 
+    def to_dict(self) -> Dict:
+        """Convert to a JSON-serializable dict without deep-copying fields"""
+        return {
+            "category": self.category,
+            "impact_level": self.impact_level.value,
+            "file_path": self.file_path,
+            "description": self.description,
+            "details": self.details,
+            "recommendation": self.recommendation,
+        }
+
 
 @dataclass
 class ImpactReport:
@@ -59,29 +140,282 @@ class ImpactReport:
     items: List[ImpactItem] = field(default_factory=list)
     summary: Dict[str, int] = field(default_factory=dict)
     changed_files: List[str] = field(default_factory=list)
+    by_level: Dict[ImpactLevel, List[ImpactItem]] = field(
+        default_factory=lambda: {level: [] for level in ImpactLevel}, init=False, repr=False
+    )
 
     def add_item(self, item: ImpactItem):
         """Add an impact item and update overall impact"""
         self.items.append(item)
+        self.by_level[item.impact_level].append(item)
         if item.impact_level > self.overall_impact:
             self.overall_impact = item.impact_level
 
     def generate_summary(self):
         """Generate summary statistics"""
+        counts = Counter(i.impact_level for i in self.items)
         self.summary = {
             "total_items": len(self.items),
-            "critical": len([i for i in self.items if i.impact_level == ImpactLevel.CRITICAL]),
-            "high": len([i for i in self.items if i.impact_level == ImpactLevel.HIGH]),
-            "medium": len([i for i in self.items if i.impact_level == ImpactLevel.MEDIUM]),
-            "low": len([i for i in self.items if i.impact_level == ImpactLevel.LOW]),
+            "critical": counts[ImpactLevel.CRITICAL],
+            "high": counts[ImpactLevel.HIGH],
+            "medium": counts[ImpactLevel.MEDIUM],
+            "low": counts[ImpactLevel.LOW],
         }
 
 
+# Numbered/named backreferences and conditional groups, which depend on group numbering
+_GROUP_REFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+# Members of re's \d, \w and \s classes among ASCII characters, spelled out so
+# Hyperscan can't read them differently (its \s omits \x1c-\x1f)
+_HYPERSCAN_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: "0-9",
+    sre_constants.CATEGORY_WORD: "0-9A-Za-z_",
+    sre_constants.CATEGORY_SPACE: "\\x09-\\x0d\\x1c-\\x20",
+    # Hyperscan's negated classes match a superset of re's on ASCII text
+    sre_constants.CATEGORY_NOT_DIGIT: "\\D",
+    sre_constants.CATEGORY_NOT_WORD: "\\W",
+    sre_constants.CATEGORY_NOT_SPACE: "\\S",
+}
+
+# Anchors that mean the same per line in both engines; \A and \Z are left out since
+# Hyperscan scans all of a file's added lines as one buffer
+_HYPERSCAN_ANCHORS = {
+    sre_constants.AT_BEGINNING: "^",
+    sre_constants.AT_END: "$",
+    sre_constants.AT_BOUNDARY: "\\b",
+    sre_constants.AT_NON_BOUNDARY: "\\B",
+}
+
+# Global flags that don't change what a parsed pattern matches
+_HYPERSCAN_NEUTRAL_FLAGS = re.IGNORECASE | re.UNICODE | re.VERBOSE
+
+
+def _hyperscan_char(code: int) -> str:
+    """Spell out an ASCII character for a Hyperscan pattern"""
+    # Non-ASCII characters can case-fold to ASCII ones under re (e.g. the Kelvin sign)
+    if code > 0x7f:
+        raise ValueError(f"non-ASCII character {chr(code)!r}")
+    return chr(code) if chr(code).isalnum() else f"\\x{code:02x}"
+
+
+def _hyperscan_class(items) -> str:
+    """Rewrite a parsed character class as a Hyperscan class"""
+    negate = ""
+    members = []
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = "^"
+        elif op is sre_constants.LITERAL:
+            members.append(_hyperscan_char(av))
+        elif op is sre_constants.RANGE:
+            members.append(f"{_hyperscan_char(av[0])}-{_hyperscan_char(av[1])}")
+        elif op is sre_constants.CATEGORY and av in _HYPERSCAN_CATEGORIES:
+            members.append(_HYPERSCAN_CATEGORIES[av])
+        else:
+            raise ValueError(f"unsupported class member {op}")
+    return f"[{negate}{''.join(members)}]"
+
+
+def _hyperscan_syntax(items) -> str:
+    """Rewrite a parsed pattern in the subset of syntax both engines read the same way"""
+    parts = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            parts.append(_hyperscan_char(av))
+        elif op is sre_constants.NOT_LITERAL:
+            parts.append(f"[^{_hyperscan_char(av)}]")
+        elif op is sre_constants.ANY:
+            parts.append(".")
+        elif op is sre_constants.IN:
+            parts.append(_hyperscan_class(av))
+        elif op is sre_constants.MAX_REPEAT or op is sre_constants.MIN_REPEAT:
+            # Laziness can't change whether a line matches at all
+            low, high, sub = av
+            bound = f"{{{low},}}" if high is sre_constants.MAXREPEAT else f"{{{low},{high}}}"
+            parts.append(f"(?:{_hyperscan_syntax(sub)}){bound}")
+        elif op is sre_constants.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            if add_flags or del_flags:
+                raise ValueError("scoped inline flags")
+            parts.append(f"(?:{_hyperscan_syntax(sub)})")
+        elif op is sre_constants.BRANCH:
+            parts.append(f"(?:{'|'.join(_hyperscan_syntax(alternative) for alternative in av[1])})")
+        elif op is sre_constants.AT and av in _HYPERSCAN_ANCHORS:
+            parts.append(_HYPERSCAN_ANCHORS[av])
+        elif op is sre_constants.ASSERT or op is sre_constants.ASSERT_NOT:
+            # Dropping a lookaround only widens what matches, which a prefilter allows
+            continue
+        else:
+            raise ValueError(f"unsupported construct {op}")
+    return "".join(parts)
+
+
+def _to_hyperscan_pattern(pattern: str) -> Optional[str]:
+    """Translate a content pattern as re parses it for Hyperscan, or None if it can't be"""
+    # Hyperscan reads some syntax differently (e.g. "{,3}" is literal to it), so the
+    # pattern is re-spelled from re's own parse rather than passed through as written
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+        # Patterns that can match an empty string match every line, but Hyperscan
+        # never reports empty matches
+        if parsed.state.flags & ~_HYPERSCAN_NEUTRAL_FLAGS or parsed.getwidth()[0] == 0:
+            return None
+        return _hyperscan_syntax(parsed)
+    except (re.error, ValueError):
+        return None
+
+# Hunk header, capturing the starting line number in the new file
+_HUNK_RE = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+
+def _iter_added_lines(diff_lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Yield added lines from a diff as (new file line number, content) pairs"""
+    current_line = 0
+
+    for diff_line in diff_lines:
+        # Dispatch on the first character so each line needs at most two checks
+        marker = diff_line[:1]
+        if marker == '+':
+            if diff_line[:3] != '+++':
+                yield current_line, diff_line[1:]
+            current_line += 1
+        elif marker == '-' or marker == '\\':
+            # Removed lines and "no newline" markers don't increment the new file line counter
+            continue
+        elif marker == '@':
+            # Parse hunk header for new file line number
+            hunk_match = _HUNK_RE.match(diff_line)
+            if hunk_match:
+                current_line = int(hunk_match.group(1))
+            else:
+                current_line += 1
+        else:
+            # Context line
+            current_line += 1
+
+
+# Extended header lines that may precede the line naming a file in a git diff
+_EXTENDED_HEADER_PREFIXES = (
+    "old mode ", "new mode ", "deleted file mode ", "new file mode ", "copy from ",
+    "rename from ", "similarity index ", "dissimilarity index ", "index ", "--- ",
+)
+
+_QUOTED_PATH_ESCAPES = {
+    "a": "\a", "b": "\b", "t": "\t", "n": "\n", "v": "\v", "f": "\f", "r": "\r", '"': '"', "\\": "\\",
+}
+
+
+def _unquote_git_path(path: str) -> str:
+    """Undo git's C-style quoting of a path, if it is quoted"""
+    if len(path) < 2 or path[0] != '"' or path[-1] != '"':
+        return path
+
+    body = path[1:-1]
+    unquoted = bytearray()
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char == "\\" and i + 1 < len(body):
+            escape = body[i + 1:i + 4]
+            if len(escape) == 3 and all(c in "01234567" for c in escape):
+                # Octal escapes are raw bytes of the UTF-8 encoded name
+                unquoted.append(int(escape, 8))
+                i += 4
+                continue
+            unquoted += _QUOTED_PATH_ESCAPES.get(body[i + 1], body[i + 1]).encode()
+            i += 2
+            continue
+        unquoted += char.encode()
+        i += 1
+
+    return unquoted.decode("utf-8", errors="replace")
+
+
+def _parse_diff_header_path(header: str) -> Optional[str]:
+    """Get the path from a "diff --git a/X b/X" header's arguments, or None if old and new differ"""
+    # Both sides name the same file unless it was renamed or copied, so split at the
+    # midpoint rather than on " b/", which may itself appear in the path
+    middle = len(header) // 2
+    if len(header) % 2 == 0 or header[middle] != " ":
+        return None
+    old_path = _unquote_git_path(header[:middle])
+    new_path = _unquote_git_path(header[middle + 1:])
+    if old_path.startswith("a/") and new_path.startswith("b/") and old_path[2:] == new_path[2:]:
+        return new_path[2:]
+    return None
+
+
+def _path_from_extended_header(line: str) -> Optional[str]:
+    """Get the new path from a rename/copy target or "+++" line, or None if the line has none"""
+    for prefix in ("rename to ", "copy to "):
+        if line.startswith(prefix):
+            return _unquote_git_path(line[len(prefix):])
+    if line.startswith("+++ "):
+        path = _unquote_git_path(line[4:])
+        if path.startswith("b/"):
+            return path[2:]
+    return None
+
+
+# Limits diffs to the whole repository except the .github directory, whatever the cwd
+_DIFF_PATHSPEC = ("--", ":(top)", ":(top,exclude).github")
+
+# Files adding more lines than this are likely generated and are not content-scanned
+DEFAULT_MAX_ADDED_LINES = 5000
+
+# Per-user subdirectory of the XDG cache directory where reports are cached, keyed by
+# resolved refs, config, and this script's contents
+CACHE_DIR_NAME = "sc-impact-cache"
+
+
+def _get_cache_dir() -> Optional[Path]:
+    """Get the private per-user report cache directory, or None if it isn't safe to use"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    cache_dir = Path(cache_home) / CACHE_DIR_NAME
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        dir_stat = cache_dir.lstat()
+    except OSError as e:
+        print(f"Report cache disabled: {e}", file=sys.stderr)
+        return None
+
+    # Cached reports are trusted as-is, so refuse a directory anyone else could write to
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+        print(f"Report cache disabled: {cache_dir} is not a private directory owned by the current user", file=sys.stderr)
+        return None
+    return cache_dir
+
+
 class SCEnvironmentImpactChecker:
     """Analyzes code changes for SC Environment deployment impact"""
 
-    def __init__(self, config_path: Optional[Path] = None):
+    def __init__(
+        self,
+        config_path: Optional[Path] = None,
+        max_added_lines: int = DEFAULT_MAX_ADDED_LINES,
+        use_cache: bool = True,
+        use_hyperscan: bool = False
+    ):
         self.config = self._load_config(config_path)
+        self.max_added_lines = max_added_lines
+        self.use_cache = use_cache
+        self.use_hyperscan = use_hyperscan
+        # Set when a git call fails mid-analysis, so the partial report isn't cached
+        self._scan_incomplete = False
+        # Old path of each renamed or copied file, keyed by its new path
+        self._rename_sources: Dict[str, str] = {}
+        # Serialized before compiling, which adds non-JSON values to the config
+        self._config_json = json.dumps(self.config, sort_keys=True, default=str)
+        self._compile_patterns()
+
+        # Categories that inspect diff content vs. those decided by file path alone
+        self._content_categories = {
+            name for name, pattern_config in self.config["patterns"].items()
+            if pattern_config.get("content_patterns")
+        }
+        self._path_only_categories = set(self.config["patterns"]) - self._content_categories
+
         self.report = ImpactReport(overall_impact=ImpactLevel.NONE)
 
     def _load_config(self, config_path: Optional[Path]) -> dict:
@@ -202,100 +536,374 @@ class SCEnvironmentImpactChecker:
             }
         }
 
+    def _compile_patterns(self):
+        """Pre-compile path globs and content regex patterns once so matching bypasses the re module cache"""
+        for pattern_config in self.config["patterns"].values():
+            path_patterns = pattern_config.get("paths", [])
+            pattern_config["_compiled_paths"] = (
+                re.compile("|".join(translate(pattern) for pattern in path_patterns))
+                if path_patterns else None
+            )
+            pattern_config["_compiled_content_patterns"] = [
+                re.compile(pattern, re.IGNORECASE)
+                for pattern in pattern_config.get("content_patterns") or []
+            ]
+
+        # Fuse every content pattern into one alternation used to discard lines
+        # that cannot match any category before running the individual patterns
+        all_patterns = [
+            pattern
+            for pattern_config in self.config["patterns"].values()
+            for pattern in pattern_config.get("content_patterns") or []
+        ]
+        self._master_pattern = None
+        # Group references would point at another pattern's groups once fused, so
+        # patterns using them disable the prefilter and every line is scanned
+        if all_patterns and not any(_GROUP_REFERENCE_RE.search(pattern) for pattern in all_patterns):
+            try:
+                self._master_pattern = re.compile(
+                    "|".join(f"(?:{pattern})" for pattern in all_patterns), re.IGNORECASE
+                )
+            except re.error:
+                # Patterns that can't be combined (e.g. inline global flags or duplicate
+                # group names) are still scanned individually
+                pass
+
+        self._hyperscan_db = None
+        # Hyperscan scratch space can't be shared between concurrent scans
+        self._hyperscan_local = threading.local()
+        if self.use_hyperscan and hyperscan is None:
+            print("Hyperscan is not installed, using re for content patterns", file=sys.stderr)
+        hyperscan_patterns = (
+            [_to_hyperscan_pattern(pattern) for pattern in all_patterns]
+            if self.use_hyperscan and hyperscan is not None else []
+        )
+        # Lines are only kept when some pattern might match them, so Hyperscan is used
+        # only if every pattern translates; otherwise all of them stay on re
+        if hyperscan_patterns and None not in hyperscan_patterns:
+            # Prefilter mode may approximate constructs too costly to run exactly (e.g.
+            # large bounded repeats), but only ever with a superset of their matches
+            flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_PREFILTER
+            try:
+                db = hyperscan.Database()
+                db.compile(
+                    expressions=[pattern.encode() for pattern in hyperscan_patterns],
+                    ids=list(range(len(hyperscan_patterns))),
+                    elements=len(hyperscan_patterns),
+                    flags=[flags] * len(hyperscan_patterns),
+                )
+                self._hyperscan_db = db
+            except hyperscan.error as e:
+                print(f"Hyperscan unavailable for content patterns, using re: {e}", file=sys.stderr)
+
     def get_changed_files(self, base_ref: str, head_ref: str) -> List[str]:
         """Get list of changed files between two refs"""
         try:
             result = subprocess.run(
-                ["git", "diff", "--name-only", f"{base_ref}...{head_ref}"],
+                ["git", "diff", "--name-status", "-z", f"{base_ref}...{head_ref}"],
                 capture_output=True,
-                text=True,
+                # Unquoted names are raw bytes, which needn't be valid UTF-8
+                encoding="utf-8",
+                errors="replace",
                 check=True
             )
-            files = [f for f in result.stdout.strip().split('\n') if f]
+            # NUL-separated output leaves unusual file names unquoted
+            files = []
+            entries = iter(result.stdout.split('\0'))
+            for status in entries:
+                if not status:
+                    continue
+                path = next(entries)
+                if status[0] in "RC":
+                    # Renames and copies list the old path before the new one
+                    new_path = next(entries)
+                    self._rename_sources[new_path] = path
+                    path = new_path
+                files.append(path)
             self.report.changed_files = files
             return files
         except subprocess.CalledProcessError as e:
             print(f"Error getting changed files: {e}", file=sys.stderr)
             return []
 
-    def get_file_diff(self, file_path: str, base_ref: str, head_ref: str) -> str:
-        """Get diff for a specific file"""
+    def _prefilter_files(self, base_ref: str, head_ref: str) -> Set[str]:
+        """Get changed files worth content-scanning, excluding binary and oversized diffs"""
         try:
             result = subprocess.run(
-                ["git", "diff", f"{base_ref}...{head_ref}", "--", file_path],
+                ["git", "diff", "--numstat", "-z", f"{base_ref}...{head_ref}", *_DIFF_PATHSPEC],
                 capture_output=True,
-                text=True,
+                encoding="utf-8",
+                errors="replace",
                 check=True
             )
-            return result.stdout
-        except subprocess.CalledProcessError:
-            return ""
-
-    def check_path_patterns(self, file_path: str, patterns: List[str]) -> bool:
-        """Check if file path matches any of the glob patterns"""
-        from fnmatch import fnmatch
-        return any(fnmatch(file_path, pattern) for pattern in patterns)
+        except subprocess.CalledProcessError as e:
+            print(f"Error getting diff stats: {e}", file=sys.stderr)
+            self._scan_incomplete = True
+            return set()
+
+        scannable = set()
+        entries = iter(result.stdout.split('\0'))
+        for entry in entries:
+            if not entry:
+                continue
+            added, _deleted, path = entry.split('\t', 2)
+            if not path:
+                # Renames and copies list the old and new paths as separate entries
+                next(entries)
+                path = next(entries)
+
+            # Only files whose content would actually be scanned are checked (and logged)
+            if not (self._should_analyze(path) and self._needs_diff(path)):
+                continue
+            if self._is_scannable(path, None if added == '-' else int(added)):
+                scannable.add(path)
+
+        return scannable
+
+    def _is_scannable(self, file_path: str, added_lines: Optional[int]) -> bool:
+        """Check if a file should be content-scanned given its added line count (None if binary)"""
+        if added_lines is None:
+            print(f"Skipping content scan of binary file {file_path}", file=sys.stderr)
+            return False
+        if added_lines > self.max_added_lines:
+            print(
+                f"Skipping content scan of {file_path}: {added_lines} added lines exceeds limit of {self.max_added_lines}",
+                file=sys.stderr
+            )
+            return False
+        return True
+
+    def _should_analyze(self, file_path: str) -> bool:
+        """Check if a file is outside the .github directory and any category applies to it"""
+        if file_path.startswith('.github/') or file_path == '.github':
+            return False
+        return self._needs_diff(file_path) or self._matches_path_only_category(file_path)
+
+    def _iter_file_diffs(
+        self, base_ref: str, head_ref: str, changed_files: List[str], scannable: Set[str]
+    ) -> Iterator[Tuple[str, Iterator[str]]]:
+        """Stream the diff for all changed files from a single git call, one file at a time"""
+        # Fixed prefixes keep headers parseable whatever diff.noprefix/mnemonicPrefix say
+        proc = subprocess.Popen(
+            [
+                "git", "-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff",
+                "--src-prefix=a/", "--dst-prefix=b/", f"{base_ref}...{head_ref}", *_DIFF_PATHSPEC,
+            ],
+            stdout=subprocess.PIPE,
+            bufsize=1,
+            # Files may be in any encoding, so don't let one undecodable line abort the scan
+            encoding="utf-8",
+            errors="replace"
+        )
 
-    def check_content_patterns(self, diff_content: str, patterns: List[str]) -> List[Dict]:
-        """Check if diff content matches any regex patterns, return matches with line numbers"""
-        matches = []
-        current_line = 0
+        try:
+            current_path = None
+            keep_lines = False
+            resolving = False
+            buffer: List[str] = []
+            seen = set()
+            for line in proc.stdout:
+                line = line.rstrip("\n")
+                path = None
+                if line.startswith("diff --git "):
+                    if current_path is not None:
+                        yield current_path, iter(buffer)
+                    current_path = None
+                    keep_lines = False
+                    buffer = [line]
+                    path = _parse_diff_header_path(line[len("diff --git "):])
+                    # Renames and copies name the new path in the extended header lines
+                    resolving = path is None
+                elif resolving:
+                    buffer.append(line)
+                    path = _path_from_extended_header(line)
+                    if path is None:
+                        if not line.startswith(_EXTENDED_HEADER_PREFIXES):
+                            # Unparseable header: drop the file rather than attribute
+                            # its hunks to another one
+                            resolving = False
+                            buffer = []
+                        continue
+                    resolving = False
+                elif keep_lines:
+                    buffer.append(line)
+                    continue
+                else:
+                    continue
 
-        for diff_line in diff_content.split('\n'):
-            # Parse hunk header for new file line number
-            hunk_match = re.match(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@', diff_line)
-            if hunk_match:
-                current_line = int(hunk_match.group(1))
+                if path is not None:
+                    # Skip all files in the .github directory and files no category
+                    # applies to; only buffer hunks when a content category needs them
+                    # and the file passed the binary/size prefilter
+                    if self._should_analyze(path):
+                        current_path = path
+                        seen.add(path)
+                        keep_lines = path in scannable and self._needs_diff(path)
+                    if not keep_lines:
+                        buffer = []
+
+            if current_path is not None:
+                yield current_path, iter(buffer)
+
+            # Files whose header couldn't be parsed are still matched by path
+            for path in changed_files:
+                if path not in seen and self._should_analyze(path):
+                    yield path, iter(())
+        finally:
+            proc.stdout.close()
+            if proc.wait() != 0:
+                print(f"Error getting diffs: git diff exited with status {proc.returncode}", file=sys.stderr)
+                self._scan_incomplete = True
+
+    def _get_pygit2_trees(self, base_ref: str, head_ref: str) -> Tuple["pygit2.Tree", "pygit2.Tree"]:
+        """Resolve the merge base and head trees of base_ref...head_ref in-process"""
+        repo = pygit2.Repository(pygit2.discover_repository("."))
+        base = repo.revparse_single(base_ref).peel(pygit2.Commit)
+        head = repo.revparse_single(head_ref).peel(pygit2.Commit)
+        merge_base = repo.merge_base(base.id, head.id)
+        if merge_base is None:
+            raise ValueError(f"no merge base between {base_ref} and {head_ref}")
+        return repo[merge_base].peel(pygit2.Tree), head.tree
+
+    @staticmethod
+    def _get_pygit2_blob(tree: "pygit2.Tree", path: str) -> Optional["pygit2.Blob"]:
+        """Look up a file's blob in a tree, or None if the tree has no such file"""
+        try:
+            obj = tree[path]
+        except KeyError:
+            return None
+        return obj if isinstance(obj, pygit2.Blob) else None
+
+    def _iter_pygit2_file_diffs(
+        self, old_tree: "pygit2.Tree", new_tree: "pygit2.Tree", changed_files: List[str]
+    ) -> Iterator[Tuple[str, Iterator[str]]]:
+        """Yield each changed file's diff lines, generating patch text only when content is scanned"""
+        # Files and renames come from the git CLI, whose rename detection differs from
+        # libgit2's, so both code paths pair old and new files the same way
+        for path in changed_files:
+            if not self._should_analyze(path):
+                continue
+            if not self._needs_diff(path):
+                yield path, iter(())
                 continue
 
-            if diff_line.startswith('+') and not diff_line.startswith('+++'):
-                line_content = diff_line[1:]
-                for pattern in patterns:
-                    found = re.findall(pattern, line_content, re.IGNORECASE)
-                    for match_text in found:
-                        matches.append({
-                            'pattern': match_text,
-                            'line_number': current_line,
-                        })
-                current_line += 1
-            elif diff_line.startswith('-') or diff_line.startswith('---'):
-                # Removed lines don't increment the new file line counter
+            old_path = self._rename_sources.get(path, path)
+            # The patch reads the blobs' buffers, so they're kept referenced while it's used
+            old_blob = self._get_pygit2_blob(old_tree, old_path)
+            new_blob = self._get_pygit2_blob(new_tree, path)
+            patch = pygit2.Patch.create_from(old_blob, new_blob, old_as_path=old_path, new_as_path=path)
+            _context, added, _deleted = patch.line_stats
+            if not self._is_scannable(path, None if patch.delta.is_binary else added):
+                yield path, iter(())
                 continue
-            elif not diff_line.startswith('\\'):
-                # Context line
-                current_line += 1
 
-        return matches
+            # Universal newlines, matching the text-mode git CLI output
+            yield path, (line.rstrip("\n") for line in io.StringIO(patch.text, newline=None))
+
+    def check_path_patterns(self, file_path: str, compiled_paths: re.Pattern) -> bool:
+        """Check if file path matches any of the glob patterns"""
+        if file_path.startswith('./'):
+            file_path = file_path[2:]
+        return compiled_paths.match(file_path) is not None
+
+    def _category_applies(self, file_path: str, pattern_name: str) -> bool:
+        """Check if a category's path patterns (if any) allow it to apply to the file"""
+        compiled_paths = self.config["patterns"][pattern_name]["_compiled_paths"]
+        return compiled_paths is None or self.check_path_patterns(file_path, compiled_paths)
+
+    def _needs_diff(self, file_path: str) -> bool:
+        """Check if any category applying to the file needs its diff content"""
+        return any(self._category_applies(file_path, name) for name in self._content_categories)
+
+    def _matches_path_only_category(self, file_path: str) -> bool:
+        """Check if any category without content patterns applies to the file"""
+        return any(self._category_applies(file_path, name) for name in self._path_only_categories)
+
+    def _get_added_lines(self, diff_lines: Iterable[str]) -> List[Tuple[int, str]]:
+        """Collect added lines that could match any content pattern"""
+        if self._hyperscan_db is not None:
+            return self._hyperscan_prefilter(list(_iter_added_lines(diff_lines)))
+        if self._master_pattern is None:
+            return list(_iter_added_lines(diff_lines))
+        return [
+            (line_number, line)
+            for line_number, line in _iter_added_lines(diff_lines)
+            if self._master_pattern.search(line)
+        ]
+
+    def _hyperscan_prefilter(self, added_lines: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """Keep added lines that Hyperscan matches in a single scan of the file's added text"""
+        # Hyperscan's caseless matching is ASCII-only, so non-ASCII lines go through re
+        # to keep Unicode case folding identical to the individual patterns
+        ascii_indices = [i for i, (_, line) in enumerate(added_lines) if line.isascii()]
+        line_starts = []
+        offset = 0
+        for i in ascii_indices:
+            line_starts.append(offset)
+            offset += len(added_lines[i][1]) + 1
+
+        hits = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            # Map the match end offset back to the added line it falls on
+            hits.add(ascii_indices[bisect_right(line_starts, end) - 1])
+
+        buffer = "\n".join(added_lines[i][1] for i in ascii_indices).encode()
+        scratch = getattr(self._hyperscan_local, "scratch", None)
+        if scratch is None:
+            scratch = self._hyperscan_local.scratch = hyperscan.Scratch(self._hyperscan_db)
+        self._hyperscan_db.scan(buffer, match_event_handler=on_match, scratch=scratch)
+
+        return [
+            (line_number, line)
+            for i, (line_number, line) in enumerate(added_lines)
+            if i in hits or (
+                not line.isascii()
+                and (self._master_pattern is None or self._master_pattern.search(line))
+            )
+        ]
 
-    def analyze_file(self, file_path: str, base_ref: str, head_ref: str):
+    def check_content_patterns(self, added_lines: List[Tuple[int, str]], patterns: List[re.Pattern]) -> Iterator[Dict]:
+        """Check if added lines match any regex patterns, yield matches with line numbers"""
+        for line_number, line_content in added_lines:
+            for pattern in patterns:
+                for match_text in pattern.findall(line_content):
+                    yield {
+                        'pattern': match_text,
+                        'line_number': line_number,
+                    }
+
+    def analyze_file(self, file_path: str, diff_lines: Iterable[str]) -> List[ImpactItem]:
         """Analyze a single file for SC Environment impact"""
-        diff_content = self.get_file_diff(file_path, base_ref, head_ref)
+        items = []
+        # Parse the diff once per file rather than once per pattern category
+        added_lines = self._get_added_lines(diff_lines)
 
         for pattern_name, pattern_config in self.config["patterns"].items():
             # Check path patterns
-            path_patterns = pattern_config.get("paths", [])
-            if path_patterns and not self.check_path_patterns(file_path, path_patterns):
+            if not self._category_applies(file_path, pattern_name):
                 continue
 
             # Check content patterns in diff
-            content_patterns = pattern_config.get("content_patterns", [])
+            content_patterns = pattern_config["_compiled_content_patterns"]
             if content_patterns:
-                matches = self.check_content_patterns(diff_content, content_patterns)
-                if not matches:
-                    continue
-
-                # Deduplicate by (pattern, line_number) and limit to 5 examples
+                # Deduplicate by (pattern, line_number) and limit to 5 examples;
+                # matches are produced lazily, so scanning stops at the fifth
                 seen = set()
                 details = []
-                for m in matches:
+                for m in self.check_content_patterns(added_lines, content_patterns):
                     key = (m['pattern'], m['line_number'])
-                    if key not in seen:
-                        seen.add(key)
-                        details.append(
-                            f"Found `{m['pattern']}` in `{file_path}` at line {m['line_number']}"
-                        )
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    details.append(
+                        f"Found `{m['pattern']}` in `{file_path}` at line {m['line_number']}"
+                    )
                     if len(details) >= 5:
                         break
+
+                if not details:
+                    continue
             else:
                 details = []
 
@@ -308,126 +916,183 @@ class SCEnvironmentImpactChecker:
                 details=details,
                 recommendation=pattern_config.get("recommendation")
             )
+            items.append(item)
+
+        return items
+
+    def _get_cache_path(self, base_ref: str, head_ref: str) -> Optional[Path]:
+        """Get the report cache file for these refs, or None if they or the cache can't be used"""
+        cache_dir = _get_cache_dir()
+        if cache_dir is None:
+            return None
+
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", f"{base_ref}^{{commit}}", f"{head_ref}^{{commit}}"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except subprocess.CalledProcessError:
+            return None
+
+        # Key on commit SHAs so a moved branch pointer invalidates the entry
+        base_sha, head_sha = result.stdout.split()
+        key = hashlib.sha256(
+            "|".join((
+                base_sha,
+                head_sha,
+                self._config_json,
+                str(self.max_added_lines),
+                hashlib.sha256(Path(__file__).read_bytes()).hexdigest(),
+            )).encode()
+        ).hexdigest()
+        return cache_dir / f"{key}.json"
+
+    def _load_cached_report(self, cache_path: Path) -> bool:
+        """Populate the report from a cache file, returning whether it was loaded"""
+        try:
+            cached = json.loads(cache_path.read_text())
+            items = [
+                ImpactItem(**{**item, "impact_level": ImpactLevel(item["impact_level"])})
+                for item in cached["items"]
+            ]
+            changed_files = cached["changed_files"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        for item in items:
             self.report.add_item(item)
+        self.report.changed_files = changed_files
+        self.report.generate_summary()
+        return True
+
+    def _save_cached_report(self, cache_path: Path):
+        """Atomically write the report to a cache file"""
+        payload = json.dumps({
+            "items": [item.to_dict() for item in self.report.items],
+            "changed_files": self.report.changed_files,
+        })
+        try:
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(payload)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Error writing report cache: {e}", file=sys.stderr)
 
     def analyze(self, base_ref: str, head_ref: str) -> ImpactReport:
         """Perform full analysis of changes"""
+        cache_path = self._get_cache_path(base_ref, head_ref) if self.use_cache else None
+        if cache_path is not None and cache_path.exists() and self._load_cached_report(cache_path):
+            print(f"Using cached report from {cache_path}", file=sys.stderr)
+            return self.report
+
         changed_files = self.get_changed_files(base_ref, head_ref)
 
         if not changed_files:
             print("No changed files detected")
             return self.report
 
-        for file_path in changed_files:
-            # Skip all files in the .github directory
-            if file_path.startswith('.github/') or file_path == '.github':
-                continue
-            self.analyze_file(file_path, base_ref, head_ref)
+        trees = None
+        if pygit2 is not None:
+            try:
+                trees = self._get_pygit2_trees(base_ref, head_ref)
+            except (pygit2.GitError, KeyError, ValueError) as e:
+                print(f"Error diffing with pygit2, falling back to git: {e}", file=sys.stderr)
+
+        if trees is not None:
+            file_diffs = self._iter_pygit2_file_diffs(*trees, changed_files)
+        else:
+            # Binary and oversized files are still matched by path, but not content-scanned
+            scannable = self._prefilter_files(base_ref, head_ref)
+            file_diffs = self._iter_file_diffs(base_ref, head_ref, changed_files, scannable)
+
+        # Analyze files on a thread pool while the diff is still streaming in. In-flight
+        # files are capped so memory stays bounded, and results are collected in diff
+        # order on this thread so the report is only mutated here and keeps a stable order.
+        max_workers = min(32, (os.cpu_count() or 4) * 4)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Files in the .github directory are skipped while streaming the diff
+            for file_path, diff_lines in file_diffs:
+                pending.append(executor.submit(self.analyze_file, file_path, diff_lines))
+                if len(pending) >= max_workers:
+                    for item in pending.popleft().result():
+                        self.report.add_item(item)
+
+            while pending:
+                for item in pending.popleft().result():
+                    self.report.add_item(item)
 
         self.report.generate_summary()
+
+        if cache_path is not None and not self._scan_incomplete:
+            self._save_cached_report(cache_path)
+
         return self.report
 
+    def _format_level_section(self, lines: List[str], level: ImpactLevel):
+        """Append the detailed findings for a single impact level"""
+        items = self.report.by_level[level]
+        if not items:
+            return
+
+        lines.extend((f"#### {_IMPACT_EMOJI[level]} {level.value.upper()} Impact", ""))
+
+        for item in items:
+            lines.extend((
+                f"**{item.description}**",
+                f"- File: `{item.file_path}`",
+                f"- Category: `{item.category}`",
+            ))
+
+            if item.details:
+                lines.append("- Details:")
+                lines.extend(f"  - {detail}" for detail in item.details)
+
+            if item.recommendation:
+                lines.append(f"- **Recommendation:** {item.recommendation}")
+
+            lines.append("")
+
     def format_markdown(self, pr_number: Optional[int] = None) -> str:
         """Format report as GitHub-flavored markdown"""
-        impact_indicator = {
-            ImpactLevel.CRITICAL: "🔴",
-            ImpactLevel.HIGH: "🟠",
-            ImpactLevel.MEDIUM: "🟡",
-            ImpactLevel.LOW: "🟢",
-            ImpactLevel.NONE: "⚪"
-        }
-
-        indicator = impact_indicator[self.report.overall_impact]
+        overall_impact = self.report.overall_impact
         lines = [
             "<!-- sc-environment-impact-check -->",
             "## SC Environment Impact Assessment",
             "",
-            f"**Overall Impact:** {indicator} **{self.report.overall_impact.value.upper()}**",
+            f"**Overall Impact:** {_IMPACT_EMOJI[overall_impact]} **{overall_impact.value.upper()}**",
             "",
         ]
 
-        if self.report.overall_impact == ImpactLevel.NONE:
-            lines += [
-                "No SC Environment-specific impacts detected in this PR.",
-                "",
-                "<details>",
-                "<summary>What was checked</summary>",
-                "",
-                "This PR was automatically scanned for:",
-                "- Database migrations",
-                "- ClowdApp configuration changes",
-                "- Kessel integration changes",
-                "- AWS service integrations (S3, RDS, ElastiCache)",
-                "- Kafka topic changes",
-                "- Secrets management changes",
-                "- External dependencies",
-                "</details>",
-            ]
+        if overall_impact == ImpactLevel.NONE:
+            lines.extend(_NO_IMPACT_LINES)
             return "\n".join(lines)
 
         # Build the detailed report inside a dropdown
-        lines += [
-            "<details>",
-            "<summary>View full report</summary>",
-            "",
-        ]
+        lines.extend(("<details>", "<summary>View full report</summary>", ""))
 
         # Summary
-        if self.report.summary["total_items"] > 0:
-            lines += [
-                "### Summary",
-                "",
-                f"- **Total Issues:** {self.report.summary['total_items']}",
-            ]
+        summary = self.report.summary
+        if summary["total_items"] > 0:
+            lines.extend(("### Summary", "", f"- **Total Issues:** {summary['total_items']}"))
 
-            if self.report.summary['critical'] > 0:
-                lines.append(f"- {impact_indicator[ImpactLevel.CRITICAL]} Critical: {self.report.summary['critical']}")
-            if self.report.summary['high'] > 0:
-                lines.append(f"- {impact_indicator[ImpactLevel.HIGH]} High: {self.report.summary['high']}")
-            if self.report.summary['medium'] > 0:
-                lines.append(f"- {impact_indicator[ImpactLevel.MEDIUM]} Medium: {self.report.summary['medium']}")
-            if self.report.summary['low'] > 0:
-                lines.append(f"- {impact_indicator[ImpactLevel.LOW]} Low: {self.report.summary['low']}")
+            for level in (ImpactLevel.CRITICAL, ImpactLevel.HIGH, ImpactLevel.MEDIUM, ImpactLevel.LOW):
+                count = summary[level.value]
+                if count > 0:
+                    lines.append(f"- {_IMPACT_EMOJI[level]} {level.value.capitalize()}: {count}")
 
             lines.append("")
 
         # Detailed findings
-        lines += ["### Detailed Findings", ""]
+        lines.extend(("### Detailed Findings", ""))
 
-        # Group by impact level
-        by_level = {}
-        for item in self.report.items:
-            by_level.setdefault(item.impact_level, []).append(item)
+        for level in (ImpactLevel.CRITICAL, ImpactLevel.HIGH, ImpactLevel.MEDIUM, ImpactLevel.LOW):
+            self._format_level_section(lines, level)
 
-        for level in [ImpactLevel.CRITICAL, ImpactLevel.HIGH, ImpactLevel.MEDIUM, ImpactLevel.LOW]:
-            items = by_level.get(level, [])
-            if not items:
-                continue
-
-            lines += [
-                f"#### {impact_indicator[level]} {level.value.upper()} Impact",
-                "",
-            ]
-
-            for item in items:
-                lines += [
-                    f"**{item.description}**",
-                    f"- File: `{item.file_path}`",
-                    f"- Category: `{item.category}`",
-                ]
-
-                if item.details:
-                    lines.append("- Details:")
-                    for detail in item.details:
-                        lines.append(f"  - {detail}")
-
-                if item.recommendation:
-                    lines.append(f"- **Recommendation:** {item.recommendation}")
-
-                lines.append("")
-
-        # Action items
-        lines += [
+        lines.extend((
+            # Action items
             "### Required Actions",
             "",
             "- [ ] Review all findings above",
@@ -435,17 +1100,13 @@ class SCEnvironmentImpactChecker:
             "- [ ] Update deployment documentation if needed",
             "- [ ] Coordinate with ROSA Core team or deployment timeline",
             "",
-        ]
-
-        # Close the details dropdown
-        lines.append("</details>")
-
-        # Footer
-        lines += [
+            # Close the details dropdown
+            "</details>",
+            # Footer
             "",
             "---",
             "*This assessment was automatically generated. Please review carefully and consult with the ROSA Core team for critical/high impact changes.*",
-        ]
+        ))
 
         return "\n".join(lines)
 
@@ -457,12 +1118,20 @@ def main():
     parser.add_argument("--config", type=Path, help="Path to configuration file")
     parser.add_argument("--output-format", choices=["json", "markdown", "github"], default="github")
     parser.add_argument("--fail-on", choices=["critical", "high", "medium", "low"], help="Fail if impact level is at or above this threshold")
+    parser.add_argument("--max-added-lines", type=int, default=DEFAULT_MAX_ADDED_LINES, help="Skip content patterns for files adding more lines than this (likely generated)")
+    parser.add_argument("--no-cache", action="store_true", help=f"Don't read or write cached reports in the per-user {CACHE_DIR_NAME} cache directory")
+    parser.add_argument("--hyperscan", action="store_true", help="Prefilter added lines with Hyperscan, if installed, instead of re")
 
     args = parser.parse_args()
 
     # Load config if exists, otherwise use defaults
     config_path = args.config or Path(".github/sc-environment-impact-config.yml")
-    checker = SCEnvironmentImpactChecker(config_path if config_path.exists() else None)
+    checker = SCEnvironmentImpactChecker(
+        config_path if config_path.exists() else None,
+        args.max_added_lines,
+        use_cache=not args.no_cache,
+        use_hyperscan=args.hyperscan
+    )
 
     # Perform analysis
     report = checker.analyze(args.base_ref, args.head_ref)
@@ -473,18 +1142,21 @@ def main():
         report_dict = {
             "overall_impact": report.overall_impact.value,
             "summary": report.summary,
-            "items": [asdict(item) for item in report.items],
+            "items": [item.to_dict() for item in report.items],
             "changed_files": report.changed_files
         }
-        # Convert ImpactLevel enums to strings
-        for item in report_dict["items"]:
-            item["impact_level"] = item["impact_level"].value if isinstance(item["impact_level"], ImpactLevel) else item["impact_level"]
 
-        print(json.dumps(report_dict, indent=2))
+        # Serialize once and reuse the bytes for stdout and the artifact file
+        if orjson is not None:
+            payload = orjson.dumps(report_dict, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(report_dict, indent=2).encode()
+
+        sys.stdout.flush()
+        sys.stdout.buffer.write(payload + b"\n")
 
         # Also save to file for artifact upload
-        with open("/tmp/sc-environment-impact-report.json", "w") as f:
-            json.dump(report_dict, f, indent=2)
+        Path("/tmp/sc-environment-impact-report.json").write_bytes(payload)
 
     elif args.output_format in ["markdown", "github"]:
         markdown = checker.format_markdown(args.pr_number)
@@ -3,6 +3,8 @@
 import json
 import os
 import sys
+import time
+import urllib.error
 import urllib.request
 
 EMOJI = {
@@ -16,6 +18,10 @@ EMOJI = {
 # Possible values: draft, open, closed, merged
 SKIP_PR_STATUSES = {"draft"}
 
+# Bound each request so a hung Slack endpoint can't stall the job
+REQUEST_TIMEOUT = 5
+MAX_ATTEMPTS = 3
+
 
 def build_payload(repo, pr_number, pr_url, impact):
     emoji = EMOJI.get(impact, ":white_circle:")
@@ -50,6 +56,25 @@ def build_payload(repo, pr_number, pr_url, impact):
     }
 
 
+def post_with_retries(req):
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT):
+                return
+        except urllib.error.HTTPError as e:
+            # Client errors won't succeed on retry, except rate limiting
+            if (e.code < 500 and e.code != 429) or attempt == MAX_ATTEMPTS - 1:
+                raise
+            error = e
+        except (urllib.error.URLError, TimeoutError) as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            error = e
+        delay = 0.5 * 2 ** attempt
+        print(f"Slack request failed ({error}), retrying in {delay}s", file=sys.stderr)
+        time.sleep(delay)
+
+
 def main():
     webhook_url = os.environ.get("SC_ASSESSOR_SLACK_URL")
     if not webhook_url:
@@ -75,7 +100,7 @@ def main():
         headers={"Content-Type": "application/json"},
         method="POST",
     )
-    urllib.request.urlopen(req)
+    post_with_retries(req)
     print(f"Slack notification sent (impact: {impact})")
 
 